@@ -1,68 +1,213 @@
+import json
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+import altair as alt
 
 # [ST4] Custom page design and sidebar
 st.set_page_config(page_title="Skyscraper Insights", layout="wide", initial_sidebar_state="expanded")
 
-# [PY3] Load dataset (with try/except)
-try:
-    df = pd.read_csv('skyscrapers.csv')
-except FileNotFoundError:
-    print("File not found.")
+# Cleaned copy of skyscrapers.csv; bump the version whenever the preprocessing below changes
+PARQUET_PATH = 'skyscrapers.v2.parquet'
+
+
+# [PY3] Load the cleaned dataset from its Parquet copy, or build it from the CSV (with try/except)
+def read_skyscrapers():
+    # Reuse the Parquet copy unless the CSV is newer; a missing or unreadable copy falls back to the CSV
+    try:
+        csv_mtime = os.path.getmtime('skyscrapers.csv') if os.path.exists('skyscrapers.csv') else 0
+        if os.path.getmtime(PARQUET_PATH) >= csv_mtime:
+            return pd.read_parquet(PARQUET_PATH)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        # Only read the columns the app uses, with pyarrow's multithreaded CSV parser
+        df = pd.read_csv('skyscrapers.csv', engine='pyarrow',
+                         usecols=['name', 'statistics.height', 'location.city',
+                                  'location.latitude', 'location.longitude',
+                                  'status.completed.is completed', 'status.completed.year'])
+    except FileNotFoundError:
+        print("File not found.")
+
+    # [DA1] Filter out buildings with height = 0 or no city value
+    df = df.loc[(df['statistics.height'] > 0) & (df['location.city'].notna())].copy()
+
+    # Convert city to string to avoid Streamlit errors, then to a categorical for fast equality filters
+    df['location.city'] = df['location.city'].astype(str).astype('category')
+
+    # Renamed coordinate columns to ensure Streamlit map works correctly
+    df = df.rename(columns={'location.latitude': 'latitude', 'location.longitude': 'longitude'})
+
+    # Downcast numeric columns (float32 keeps ~7 significant digits, plenty for heights; coordinates stay
+    # float64 because st.map JSON-encodes values computed from them, which json can't do for float32)
+    df = df.astype({'statistics.height': 'float32'})
+    df['status.completed.year'] = pd.to_numeric(df['status.completed.year'], downcast='integer')
+
+    # Store completion status as a plain bool column (missing values count as not completed)
+    df['status.completed.is completed'] = df['status.completed.is completed'].fillna(False).astype(bool)
+
+    # [DA2] Sort by height (tallest to shortest)
+    df = df.sort_values(by='statistics.height', ascending=False)
+
+    # [DA1] Round height to 2 decimal places & remove trailing 0's once, shared by every table
+    df['height_fmt'] = np.char.rstrip(np.char.rstrip(np.char.mod('%.2f', df['statistics.height'].to_numpy()), '0'), '.')
+
+    # Save the cleaned, typed data so later app starts skip CSV parsing
+    # (written to a temp file first, so a partial write never replaces a good copy)
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix='.parquet.tmp', dir=os.path.dirname(PARQUET_PATH) or '.')
+        os.close(fd)
+        df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, PARQUET_PATH)
+    except OSError:
+        print(f"Could not save {PARQUET_PATH}.")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return df
+
+
+# Preprocess the dataset once; cached across Streamlit reruns
+@st.cache_data
+def load_data():
+    df = read_skyscrapers()
+
+    # [DA4] Filter to only include completed skyscrapers, and
+    # replace buildings with completion year=0 with "Unknown" (if height!=0)
+    completed_mask = df['status.completed.is completed'].to_numpy()
+    completed_df = df.iloc[np.flatnonzero(completed_mask)].assign(
+        **{'status.completed.year': lambda d: d['status.completed.year'].replace(0, "Unknown")})
+
+    # Display-ready table with renamed column headers, shared by the page one and page two tables
+    # (years as strings, so "Unknown" doesn't leave a mixed int/str column that Arrow can't serialize)
+    display_all = df[['name', 'height_fmt', 'status.completed.year']].assign(
+        **{'status.completed.year': lambda d: d['status.completed.year'].astype(str).replace('0', "Unknown")}).rename(
+        columns={'name': 'Name',
+                 'height_fmt': 'Height',
+                 'status.completed.year': 'Completion Year'
+                 })
+    display_completed = display_all.iloc[np.flatnonzero(completed_mask)]
+
+    # [PY4] Sorted list of unique city names for display (inferred categories are already sorted)
+    city_options = ['ALL CITIES'] + df['location.city'].cat.categories.tolist()
+    default_index = city_options.index('Chicago') if 'Chicago' in city_options else 0
+
+    # Lowercase name -> city lookup for the sidebar text box (reversed so the tallest match wins)
+    name_to_city = dict(zip(df['name'].str.lower()[::-1], df['location.city'][::-1]))
 
-# [DA1] Filter out buildings with height = 0 or no city value
-df = df[(df['statistics.height'] > 0) & (df['location.city'].notna())]
+    # Row positions for each city, so pages can slice a city directly instead of scanning the whole column
+    city_idx = df.groupby('location.city', observed=True).indices
+    completed_city_idx = completed_df.groupby('location.city', observed=True).indices
 
-# Convert city to string to avoid Streamlit errors
-df['location.city'] = df['location.city'].astype(str)
+    # Average completed height by year, for all cities and as a year x city table for the page one bar chart
+    avg_by_year = completed_df.groupby('status.completed.year')['statistics.height'].mean()
+    avg_by_city_year = completed_df.groupby(['location.city', 'status.completed.year'], observed=True)[
+        'statistics.height'].mean().unstack('location.city')
 
-# Renamed coordinate columns to ensure Streamlit map works correctly
-df = df.rename(columns={'location.latitude': 'latitude', 'location.longitude': 'longitude'})
+    # Shortest-to-tallest copy and its heights, so the map's height range is a binary search + contiguous slice
+    df_by_height = df.sort_values(by='statistics.height')
+    heights_sorted = df_by_height['statistics.height'].to_numpy()
+    height_city_idx = df_by_height.groupby('location.city', observed=True).indices
 
-# [PY2] Function to get 5 tallest skyscrapers in selected city
+    return (df, display_all, display_completed, city_options, default_index, name_to_city, city_idx,
+            completed_city_idx, avg_by_year, avg_by_city_year, df_by_height, heights_sorted, height_city_idx)
+
+
+(df, display_all, display_completed, city_options, default_index, name_to_city, city_idx,
+ completed_city_idx, avg_by_year, avg_by_city_year, df_by_height, heights_sorted, height_city_idx) = load_data()
+
+
+# [PY2] Function to get 5 tallest skyscrapers in selected city (cached per city and top_n)
+@st.cache_data
 def get_tallest_skyscrapers(city, top_n=5):
     if city == 'ALL CITIES':  # [DA3] find top 5 tallest skyscrapers in a given city
         city_df = df.head(top_n)
     else:
-        city_df = df[df['location.city'] == city].head(top_n)
+        city_df = df.iloc[city_idx.get(city, [])].head(top_n)
     skyscraper_count = len(city_df)
     return city_df, skyscraper_count
 
-# [DA2] Sort by height (tallest to shortest)
-df = df.sort_values(by='statistics.height', ascending=False)
 
-# [DA4] Filter to only include completed skyscrapers
-completed_df = df[df['status.completed.is completed'] == True]
+# Table of names, heights, and completion years for a city (optionally completed only, or just the top_n tallest)
+def get_display_table(city, top_n=None, completed_only=False):
+    if completed_only:
+        table = display_completed
+        if city != 'ALL CITIES':
+            table = table.iloc[completed_city_idx.get(city, [])]
+    else:
+        table = display_all
+        if city != 'ALL CITIES':
+            table = table.iloc[city_idx.get(city, [])]
+    if top_n is not None:
+        table = table.head(top_n)
+    # Reset index column (to not show original row numbers)
+    return table.reset_index(drop=True)
+
+
+# Horizontal bar chart of the tallest skyscrapers with one bar per building, even when names repeat
+def tallest_skyscrapers_chart(top_df, color, title):
+    # Rows are already tallest first, so the rank gives each building its own bar; the axis shows its name
+    chart_df = pd.DataFrame({'rank': np.arange(1, len(top_df) + 1),
+                             'name': top_df['name'].to_numpy(),
+                             'height': top_df['statistics.height'].to_numpy()})
+    name_labels = json.dumps(chart_df['name'].tolist())
+    return alt.Chart(chart_df).mark_bar(color=color).encode(
+        x=alt.X('height:Q', stack=None, title='Height (m)'),
+        y=alt.Y('rank:O', sort=None, title='Building Name',
+                axis=alt.Axis(labelExpr=f"{name_labels}[datum.value - 1]")),
+        tooltip=[alt.Tooltip('name:N', title='Building Name'), alt.Tooltip('height:Q', title='Height (m)')]
+    ).properties(title=title)
+
+
+# [DA5] Coordinates of skyscrapers in a city within a height range for the map (cached per city and range)
+@st.cache_data
+def get_map_points(city, min_height, max_height):
+    # Rows are already in height order, so the range is two binary searches and a slice, with no masks
+    if city == 'ALL CITIES':
+        lo_i = np.searchsorted(heights_sorted, min_height, side='left')
+        hi_i = np.searchsorted(heights_sorted, max_height, side='right')
+        map_filtered_df = df_by_height.iloc[lo_i:hi_i]
+    else:
+        city_rows = height_city_idx.get(city, [])
+        city_heights = heights_sorted[city_rows]
+        lo_i = np.searchsorted(city_heights, min_height, side='left')
+        hi_i = np.searchsorted(city_heights, max_height, side='right')
+        map_filtered_df = df_by_height.iloc[city_rows[lo_i:hi_i]]
+    return map_filtered_df[['latitude', 'longitude']]
 
-# Replace buildings with completion year=0 with "Unknown" (if height!=0)
-completed_df['status.completed.year'] = completed_df['status.completed.year'].replace(0, "Unknown")
 
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Completed Skyscrapers", "Tallest Skyscrapers", "Map of Skyscrapers"])
 
-# [PY4] List comprehension to create a sorted list of unique city names for display
-city_options = ['ALL CITIES'] + sorted({city for city in df['location.city']})
-
-default_index = city_options.index('Chicago') if 'Chicago' in city_options else 0
-
 # [ST1] Dropdown menu for cities (on sidebar)
 city = st.sidebar.selectbox("Select a City", city_options, index=default_index)
 
 # [ST2] Text box in the sidebar to input skyscraper name and find which city it's located in
-skyscraper_name_input = st.sidebar.text_input("Enter a skyscraper name:")
-standardized_name = skyscraper_name_input.strip().lower()
-
-# See if inputted skyscraper name is in the dataset
-if standardized_name:
-    matching_skyscrapers = df[df['name'].str.lower() == standardized_name]
-    if not matching_skyscrapers.empty:
-        city_of_skyscraper = matching_skyscrapers.iloc[0]['location.city']
-        st.sidebar.write(f"The skyscraper '{skyscraper_name_input}' is located in {city_of_skyscraper}.")
-    else:
-        st.sidebar.write(f"Sorry, no skyscraper named '{skyscraper_name_input}' found.")
-else:  # When input is blank
-    st.sidebar.write("Enter a skyscraper name to find its city.")
+# (a fragment, so typing a name only reruns this block instead of the whole page)
+@st.fragment
+def skyscraper_name_lookup():
+    skyscraper_name_input = st.text_input("Enter a skyscraper name:")
+    standardized_name = skyscraper_name_input.strip().lower()
+
+    # See if inputted skyscraper name is in the dataset
+    if standardized_name:
+        city_of_skyscraper = name_to_city.get(standardized_name)
+        if city_of_skyscraper is not None:
+            st.write(f"The skyscraper '{skyscraper_name_input}' is located in {city_of_skyscraper}.")
+        else:
+            st.write(f"Sorry, no skyscraper named '{skyscraper_name_input}' found.")
+    else:  # When input is blank
+        st.write("Enter a skyscraper name to find its city.")
+
+
+# Fragments can't call st.sidebar themselves, so render this one inside the sidebar
+with st.sidebar:
+    skyscraper_name_lookup()
 
 
 # PAGE ONE
@@ -73,37 +218,25 @@ if page == "Completed Skyscrapers":
     st.markdown("[Click here to view the bar chart](#bar-chart)")
 
     # Filter data based on selected city
-    if city == "ALL CITIES":
-        filtered_df = completed_df
-    else:
-        filtered_df = completed_df[completed_df['location.city'] == city]
-
-    # Rename column headers
-    display_df = filtered_df[['name', 'statistics.height', 'status.completed.year']].rename(
-        columns={'name': 'Name',
-                 'statistics.height': 'Height',
-                 'status.completed.year': 'Completion Year'
-                 })
-
-    # [DA1] Use lambda function to round height to 2 decimal places & remove trailing 0's
-    display_df['Height'] = display_df['Height'].apply(lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
-
-    # Reset index column (to not show original row numbers)
-    display_df.reset_index(drop=True, inplace=True)
+    display_df = get_display_table(city, completed_only=True)
 
     # [VIZ1] Table of skyscraper names, heights, and completion years for selected city
     st.table(display_df)
 
     # [VIZ2] Bar chart for average skyscraper height by completion year
     st.markdown('<a id="bar-chart"></a>', unsafe_allow_html=True)  # Hyperlink destination
-    avg_height = filtered_df.groupby('status.completed.year')['statistics.height'].mean()
-    fig, ax = plt.subplots()
-    avg_height.plot(kind='bar', color='skyblue', ax=ax)
-    ax.set_title(f"Average Skyscraper Height by Completion Year in {city if city != 'ALL CITIES' else 'All Cities'}")
-    ax.set_xlabel('Completion Year')
-    ax.set_ylabel('Average Height (m)')
-    ax.set_xticks(range(0, len(avg_height), 25))  # Only label every 25 years
-    st.pyplot(fig)
+    if city == "ALL CITIES":
+        avg_height = avg_by_year
+    else:
+        avg_height = avg_by_city_year.get(city, pd.Series(dtype=float)).dropna()
+    avg_height_df = pd.DataFrame({'year': avg_height.index.astype(str), 'height': avg_height.to_numpy()})
+    chart = alt.Chart(avg_height_df).mark_bar(color='skyblue').encode(
+        x=alt.X('year:N', sort=None, title='Completion Year',
+                axis=alt.Axis(values=avg_height_df['year'].tolist()[::25])),  # Only label every 25 years
+        y=alt.Y('height:Q', title='Average Height (m)')
+    ).properties(
+        title=f"Average Skyscraper Height by Completion Year in {city if city != 'ALL CITIES' else 'All Cities'}")
+    st.altair_chart(chart, width='stretch')
 
 # PAGE TWO
 elif page == "Tallest Skyscrapers":
@@ -114,34 +247,16 @@ elif page == "Tallest Skyscrapers":
     top_skyscrapers_default, skyscraper_count_default = get_tallest_skyscrapers(city)
     st.write(f"Top {skyscraper_count_default} skyscrapers in {city}:")
 
-    top_skyscrapers_default['status.completed.year'] = top_skyscrapers_default['status.completed.year'].replace(0, "Unknown")
-
-    # Rename column headers
-    display_top_skyscrapers = top_skyscrapers_default[['name', 'statistics.height', 'status.completed.year']].rename(
-        columns={
-            'name': 'Name',
-            'statistics.height': 'Height',
-            'status.completed.year': 'Completion Year'
-        })
-
-    # [DA1] Use lambda function to round height to 2 decimal places & remove trailing 0's
-    display_top_skyscrapers['Height'] = display_top_skyscrapers['Height'].apply(
-        lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
-
-    # Reset index column (to not show original row numbers)
-    display_top_skyscrapers.reset_index(drop=True, inplace=True)
+    display_top_skyscrapers = get_display_table(city, top_n=5)
 
     # Table of top 5 tallest skyscraper names, heights, and completion years for selected city
     st.table(display_top_skyscrapers)
 
     # [VIZ3] Horizontal bar chart for tallest skyscrapers
-    fig2, ax2 = plt.subplots()
-    ax2.barh(top_skyscrapers_default['name'], top_skyscrapers_default['statistics.height'], color='lightcoral')
-    ax2.set_title(
+    chart2 = tallest_skyscrapers_chart(
+        top_skyscrapers_default, 'lightcoral',
         f"Top {len(top_skyscrapers_default)} Tallest Skyscrapers in {city if city != 'ALL CITIES' else 'All Cities'}")
-    ax2.set_xlabel('Height (m)')
-    ax2.set_ylabel('Building Name')
-    st.pyplot(fig2)
+    st.altair_chart(chart2, width='stretch')
 
 
     # [PY1] Second call to get_tallest_skyscrapers with a non-default top_n=20
@@ -149,33 +264,16 @@ elif page == "Tallest Skyscrapers":
     top_20_skyscrapers, skyscraper_count_20 = get_tallest_skyscrapers(city, top_n=20)
     st.write(f"Top {skyscraper_count_default} skyscrapers in {city}:")
 
-    top_20_skyscrapers['status.completed.year'] = top_20_skyscrapers['status.completed.year'].replace(0, "Unknown")
-
-    # Rename column headers
-    display_top_20_skyscrapers = top_20_skyscrapers[['name', 'statistics.height', 'status.completed.year']].rename(
-        columns={
-            'name': 'Name',
-            'statistics.height': 'Height',
-            'status.completed.year': 'Completion Year'
-        })
-
-    # [DA1] Use lambda function to round height to 2 decimal places & remove trailing 0's
-    display_top_20_skyscrapers['Height'] = display_top_20_skyscrapers['Height'].apply(
-        lambda x: f"{x:.2f}".rstrip('0').rstrip('.'))
-
-    # Reset index column (to not show original row numbers)
-    display_top_20_skyscrapers.reset_index(drop=True, inplace=True)
+    display_top_20_skyscrapers = get_display_table(city, top_n=20)
 
     # Table of top 20 tallest skyscraper names, heights, and completion years for selected city
     st.table(display_top_20_skyscrapers)
 
     # [VIZ4] Horizontal bar chart for top 3 tallest skyscrapers
-    fig3, ax3 = plt.subplots()
-    ax3.barh(top_20_skyscrapers['name'], top_20_skyscrapers['statistics.height'], color='lightgreen')
-    ax3.set_title(f"Top 20 Tallest Skyscrapers in {city if city != 'ALL CITIES' else 'All Cities'}")
-    ax3.set_xlabel('Height (m)')
-    ax3.set_ylabel('Building Name')
-    st.pyplot(fig3)
+    chart3 = tallest_skyscrapers_chart(
+        top_20_skyscrapers, 'lightgreen',
+        f"Top 20 Tallest Skyscrapers in {city if city != 'ALL CITIES' else 'All Cities'}")
+    st.altair_chart(chart3, width='stretch')
 
 # PAGE THREE
 elif page == "Map of Skyscrapers":
@@ -184,15 +282,6 @@ elif page == "Map of Skyscrapers":
     # [ST3] Slider to filter skyscrapers by height with default range (300-600)
     height_range = st.slider("Select Height Range (meters)", 0, 2000, (300, 600), 100)
 
-    # [DA5] Filter data based on city and height range for map
-    if city == "ALL CITIES":
-        map_filtered_df = df[(df['statistics.height'] >= height_range[0]) &
-                             (df['statistics.height'] <= height_range[1])]
-    else:
-        map_filtered_df = df[(df['location.city'] == city) &
-                             (df['statistics.height'] >= height_range[0]) &
-                             (df['statistics.height'] <= height_range[1])]
-
     # [MAP] Map of skyscrapers for selected height range and city
     st.write(f"Displaying skyscrapers in {city if city != 'ALL CITIES' else 'all cities'} within selected height range.")
-    st.map(map_filtered_df[['latitude', 'longitude']])
+    st.map(get_map_points(city, height_range[0], height_range[1]))
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import runpy
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, 'finalproject.py')
+PARQUET_PATH = 'skyscrapers.v2.parquet'
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    # The app reads skyscrapers.csv (and writes its Parquet copy) relative to the working directory
+    shutil.copy(os.path.join(REPO_DIR, 'skyscrapers.csv'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def run_app(page=None, city=None):
+    # Drop load_data results from earlier tests so each run reads from disk
+    st.cache_data.clear()
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    if page is not None:
+        at.sidebar.radio[0].set_value(page)
+    if city is not None:
+        at.sidebar.selectbox[0].set_value(city)
+    return at.run()
+
+
+@pytest.mark.parametrize('city', ['Chicago', 'ALL CITIES'])
+def test_map_page_renders(app_dir, city):
+    at = run_app("Map of Skyscrapers", city)
+    assert not at.exception
+
+
+def test_unreadable_parquet_falls_back_to_csv(app_dir):
+    with open(PARQUET_PATH, 'wb') as f:
+        f.write(b'PAR1 truncated')
+    at = run_app()
+    assert not at.exception
+    assert len(pd.read_parquet(PARQUET_PATH)) > 0
+
+
+def test_parquet_older_than_csv_is_rebuilt(app_dir):
+    pd.DataFrame({'name': ['stale']}).to_parquet(PARQUET_PATH)
+    csv_mtime = os.path.getmtime('skyscrapers.csv')
+    os.utime(PARQUET_PATH, (csv_mtime - 60, csv_mtime - 60))
+    at = run_app()
+    assert not at.exception
+    assert 'stale' not in pd.read_parquet(PARQUET_PATH)['name'].tolist()
+
+
+def chart_data(chart):
+    # Vega-Lite charts carry their data as Arrow IPC bytes in a named dataset
+    return pa.ipc.open_stream(chart.proto.datasets[0].data.data).read_pandas()
+
+
+@pytest.mark.parametrize('city', ['ALL CITIES', 'New York City'])
+def test_tallest_chart_has_one_bar_per_building(app_dir, city):
+    at = run_app("Tallest Skyscrapers", city)
+    assert not at.exception
+    top_20_chart = at.get('vega_lite_chart')[1]
+    spec = json.loads(top_20_chart.proto.spec)
+    data = chart_data(top_20_chart)
+    # Repeated names (e.g. One World Trade Center) must not be stacked into one bar
+    assert data['name'].duplicated().any()
+    assert spec['encoding']['x']['stack'] is None
+    assert data[spec['encoding']['y']['field']].is_unique
+    assert len(data) == 20
+
+
+
+class ArrowFallbackHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.mark.parametrize('page', ["Completed Skyscrapers", "Tallest Skyscrapers"])
+@pytest.mark.parametrize('city', ['Chicago', 'ALL CITIES'])
+def test_tables_serialize_to_arrow(app_dir, page, city):
+    # Streamlit logs (rather than raises) when pyarrow rejects a frame and it has to fix the column types
+    handler = ArrowFallbackHandler()
+    logger = logging.getLogger('streamlit.dataframe_util')
+    logger.addHandler(handler)
+    try:
+        at = run_app(page, city)
+    finally:
+        logger.removeHandler(handler)
+    assert not at.exception
+    assert not [m for m in handler.messages if 'Arrow' in m]
+
+
+@pytest.fixture
+def app_globals(app_dir):
+    # Outside `streamlit run` the st.* calls are no-ops, so the script's functions can be called directly
+    st.cache_data.clear()
+    return runpy.run_path(APP_PATH)
+
+
+@pytest.mark.parametrize('city, min_height, max_height', [
+    ('ALL CITIES', 300, 600),
+    ('ALL CITIES', 0, 2000),
+    ('ALL CITIES', 1700, 2000),  # empty range
+    ('Chicago', 300, 600),
+    ('Chicago', 700, 1500),  # city with no rows in range
+    ('New York City', 400, 500),
+    ('Dubai', 300, 900),
+    ('Shanghai', 400, 700),
+])
+def test_map_points_match_mask_filter(app_globals, city, min_height, max_height):
+    df = app_globals['df']
+    mask = (df['statistics.height'] >= min_height) & (df['statistics.height'] <= max_height)
+    if city != 'ALL CITIES':
+        mask &= df['location.city'] == city
+    points = app_globals['get_map_points'](city, min_height, max_height)
+    assert sorted(points.index) == sorted(df.index[mask])
+    assert list(points.columns) == ['latitude', 'longitude']